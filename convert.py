@@ -1,6 +1,7 @@
 """convert scraped html documentation to markdown format."""
 
 import os
+import copy
 import requests
 from bs4 import BeautifulSoup
 from tqdm import tqdm
@@ -16,6 +17,8 @@ class CustomMarkdownConverter(MarkdownConverter):
         # pass through the raw html for iframes
         # but first, make sure that the src is absolute
         # because some are missing 'https:'
+        # work on a copy of the iframe so the parsed article is left unchanged
+        el = copy.copy(el)
         src = el.get('src', '')
         if src and not src.startswith(('http://', 'https://')):
             src = 'https:' + src
@@ -27,10 +30,12 @@ class CustomMarkdownConverter(MarkdownConverter):
     def convert_table(self, el, text, parent_tags):
         """custom table converter to automatically detect header rows."""
         # first, remove the class attribute
-        el.attrs.pop('class', None)
+        # from a copy of the table so the parsed article is left unchanged
+        table = copy.copy(el)
+        table.attrs.pop('class', None)
 
         # then, convert the table to markdown
-        table_md = md(str(el))
+        table_md = md(str(table))
 
         # check row 3
         # split into columns
@@ -75,6 +80,42 @@ def get_fx_tags():
     return fx_tags
 
 
+def read_raw_html(fx_file):
+    """read a raw html file from the raw directory as bytes."""
+    with open(f'raw/{fx_file}', 'r') as f:
+        response = requests.Response()
+        response._content = f.read().encode('utf-8')
+
+    return response.content
+
+
+def get_article(html):
+    """parse raw html and return the article section as its own soup.
+    the converter does not modify it, so it can be cached and converted repeatedly.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # article in section article-container
+    article = soup.find('section', class_='article-container')
+
+    return BeautifulSoup(str(article), 'html.parser')
+
+
+def fx_to_md(name, article, fx_tags):
+    """convert a function's article soup to markdown with tag frontmatter."""
+    # convert the article to markdown
+    converter = CustomMarkdownConverter(code_language="gse")
+    md_content = converter.convert_soup(article)
+
+    # remove the first three lines
+    md_content = '\n'.join(md_content.split('\n')[3:])
+
+    # add tag frontmatter
+    md_content = f'---\ntags:\n  - function\n  - generated\n  - {fx_tags.get(name, "unknown")}\ndescription: {md_content.split(chr(10))[0].split(".")[0]}.\n---\n\n' + md_content
+
+    return md_content
+
+
 def parse_fx_to_md():
     """parse the functions to markdown format."""
     # ensure the parsed directory exists
@@ -91,24 +132,9 @@ def parse_fx_to_md():
         name = os.path.splitext(fx_file)[0]
         
         # get the raw html content
-        with open(f'raw/{fx_file}', 'r') as f:
-            response = requests.Response()
-            response._content = f.read().encode('utf-8')
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # article in section article-container
-        article = soup.find('section', class_='article-container')
-
-        # convert the article to markdown
-        converter = CustomMarkdownConverter(code_language="gse")
-        md_content = converter.convert(str(article))
-
-        # remove the first three lines
-        md_content = '\n'.join(md_content.split('\n')[3:])
+        article = get_article(read_raw_html(fx_file))
 
-        # add tag frontmatter
-        md_content = f'---\ntags:\n  - function\n  - generated\n  - {fx_tags.get(name, "unknown")}\ndescription: {md_content.split(chr(10))[0].split(".")[0]}.\n---\n\n' + md_content
+        md_content = fx_to_md(name, article, fx_tags)
 
         # write the content to a file
         with open(f'parsed/{name}.md', 'w') as f:
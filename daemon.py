@@ -0,0 +1,241 @@
+"""long-lived worker that keeps parsed documentation in memory between runs.
+a client asks it over a unix socket to reconvert functions, which skips
+interpreter startup, imports, loading the tag map and re-parsing raw html.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import importlib
+import socketserver
+from collections import OrderedDict
+
+import convert
+import processing
+
+
+SOCKET_PATH = '.gsheets-docs.sock'
+RAW_DIR = 'raw'
+PARSED_DIR = 'parsed'
+
+# maximum number of parsed article subtrees kept in memory
+MAX_CACHED_ARTICLES = 256
+
+
+class ArticleCache:
+    """lru cache of parsed article soups, keyed by function name.
+    entries are reparsed when the raw file's modification time changes.
+    """
+
+    def __init__(self, max_size=MAX_CACHED_ARTICLES):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name):
+        """return the article soup for a function, parsing the raw file if needed."""
+        fx_file = name + '.html'
+        mtime = os.stat(os.path.join(RAW_DIR, fx_file)).st_mtime_ns
+
+        entry = self.entries.get(name)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            self.entries.move_to_end(name)
+            return entry[1]
+
+        self.misses += 1
+        article = convert.get_article(convert.read_raw_html(fx_file))
+        self.entries[name] = (mtime, article)
+        self.entries.move_to_end(name)
+
+        # evict the least recently used articles
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+        return article
+
+
+class Worker:
+    """hold the tag map, link index and article cache, and reconvert functions."""
+
+    def __init__(self, max_cached=MAX_CACHED_ARTICLES):
+        self.articles = ArticleCache(max_cached)
+        self.module_mtimes = {module: os.stat(module.__file__).st_mtime_ns
+                              for module in (convert, processing)}
+        self.tags_mtime = None
+        self.fx_tags = {}
+        self.raw_mtimes = {}
+        self.resolver = processing.LinkResolver([])
+
+    def refresh(self):
+        """reload changed converter modules, the tag map and the name index."""
+        reloaded = False
+        for module, mtime in list(self.module_mtimes.items()):
+            current = os.stat(module.__file__).st_mtime_ns
+            if current != mtime:
+                importlib.reload(module)
+                self.module_mtimes[module] = current
+                reloaded = True
+
+                # cached articles were extracted by the old get_article
+                if module is convert:
+                    self.articles.entries.clear()
+
+        tags_mtime = os.stat('function_tags.csv').st_mtime_ns
+        if tags_mtime != self.tags_mtime:
+            self.fx_tags = convert.get_fx_tags()
+            self.tags_mtime = tags_mtime
+
+        # only read canonical links for raw files that are new or have changed
+        raw_mtimes = {os.path.splitext(entry.name)[0]: entry.stat().st_mtime_ns
+                      for entry in os.scandir(RAW_DIR) if entry.name.endswith('.html')}
+        if reloaded or raw_mtimes != self.raw_mtimes:
+            source_links = {name: url for name, url in self.resolver.source_links.items()
+                            if name in raw_mtimes and raw_mtimes[name] == self.raw_mtimes.get(name)}
+            for name in raw_mtimes:
+                if name not in source_links:
+                    source_links[name] = processing.get_source_link(name)
+            self.resolver = processing.LinkResolver(list(raw_mtimes), source_links)
+            self.raw_mtimes = raw_mtimes
+
+    def reconvert(self, names):
+        """convert and process the given functions, writing them to the parsed directory.
+
+        returns:
+            a list of per-function results with the output path or an error.
+        """
+        self.refresh()
+        os.makedirs(PARSED_DIR, exist_ok=True)
+
+        results = []
+        for name in names:
+            start = time.perf_counter()
+            try:
+                article = self.articles.get(name)
+                text = convert.fx_to_md(name, article, self.fx_tags)
+                text = processing.process_markdown_file(name + '.md', text, self.resolver)
+
+                path = os.path.join(PARSED_DIR, name + '.md')
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+
+                results.append({'name': name, 'path': path,
+                                'ms': (time.perf_counter() - start) * 1000})
+            except Exception as e:
+                results.append({'name': name, 'error': str(e),
+                                'ms': (time.perf_counter() - start) * 1000})
+
+        return results
+
+    def stats(self):
+        """return cache statistics."""
+        return {
+            'cached_articles': len(self.articles.entries),
+            'max_cached_articles': self.articles.max_size,
+            'cache_hits': self.articles.hits,
+            'cache_misses': self.articles.misses,
+            'names': len(self.resolver.names),
+        }
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """handle one newline-delimited json request per connection."""
+
+    def handle(self):
+        worker = self.server.worker
+
+        try:
+            request = json.loads(self.rfile.readline())
+            command = request.get('command')
+
+            if command == 'convert':
+                response = {'results': worker.reconvert(request.get('names', []))}
+            elif command == 'stats':
+                response = worker.stats()
+            elif command == 'shutdown':
+                response = {'ok': True}
+                self.server.stopping = True
+            else:
+                response = {'error': f'unknown command: {command}'}
+        except Exception as e:
+            response = {'error': str(e)}
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class WorkerServer(socketserver.UnixStreamServer):
+    """unix socket server that owns a warm worker."""
+
+    def __init__(self, socket_path, worker):
+        self.worker = worker
+        self.stopping = False
+        super().__init__(socket_path, RequestHandler)
+
+
+def serve(socket_path=SOCKET_PATH, max_cached=MAX_CACHED_ARTICLES):
+    """start the worker, warm its caches and serve requests until shut down."""
+    # remove a socket left behind by a previous run
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+
+    worker = Worker(max_cached)
+    worker.refresh()
+
+    # warm the article cache up to its limit
+    for name in sorted(worker.resolver.names)[:max_cached]:
+        worker.articles.get(name)
+
+    print(f"worker ready on {socket_path} ({len(worker.resolver.names)} functions)")
+
+    with WorkerServer(socket_path, worker) as server:
+        try:
+            # requests are handled one at a time, so the caches need no locking
+            while not server.stopping:
+                server.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(socket_path)
+
+
+def send_request(request, socket_path=SOCKET_PATH):
+    """send a request to a running worker and return its response."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as f:
+            return json.loads(f.readline())
+
+
+if __name__ == '__main__':
+    usage = "usage: python daemon.py serve | convert <function> [<function> ...] | stats | stop"
+
+    if len(sys.argv) < 2:
+        print(usage)
+        sys.exit(1)
+
+    command = sys.argv[1]
+
+    if command == 'serve':
+        serve()
+    elif command == 'convert' and len(sys.argv) > 2:
+        response = send_request({'command': 'convert', 'names': sys.argv[2:]})
+        if 'error' in response:
+            print(f"error: {response['error']}")
+            sys.exit(1)
+        for result in response['results']:
+            if 'error' in result:
+                print(f"failed {result['name']}: {result['error']}")
+            else:
+                print(f"{result['path']} ({result['ms']:.1f} ms)")
+    elif command == 'stats':
+        print(json.dumps(send_request({'command': 'stats'}), indent=2))
+    elif command == 'stop':
+        send_request({'command': 'shutdown'})
+        print("worker stopped.")
+    else:
+        print(usage)
+        sys.exit(1)
@@ -3,9 +3,22 @@
 import os
 import re
 import bs4
+from urllib.parse import urlsplit
 from tqdm import tqdm
 
 
+# markdown link scanner. link text may contain one level of nested brackets.
+# each character can only match one branch, so a failed match never backtracks
+# across the rest of the line.
+LINK_REGEX = re.compile(r'\[((?:[^\[\]\n]|\[[^\[\]\n]*\])*)\]\(([^()\n]*)\)')
+
+SUPPORT_HOST = 'support.google.com'
+
+# characters that are treated as interchangeable when matching link text
+# against filenames (filenames use '_' for spaces and '-' for slashes).
+NAME_SEPARATOR_REGEX = re.compile(r'[\s._/-]+')
+
+
 def get_source_link(file):
     """extract the canonical url from the raw html file."""
     directory = 'raw'
@@ -22,6 +35,73 @@ def get_source_link(file):
             return None
 
 
+def normalize_name(name):
+    """fold a function name or filename into its alias key.
+    case-insensitive, and spaces, dots, underscores, slashes and dashes are equivalent.
+    """
+    return NAME_SEPARATOR_REGEX.sub('_', name.strip()).lower()
+
+
+def normalize_url(url):
+    """reduce a url to host and path so relative, absolute and canonical forms match.
+    relative urls are treated as support.google.com.
+    """
+    if url.startswith('//'):
+        url = 'https:' + url
+    parts = urlsplit(url)
+    host = parts.netloc.lower() or SUPPORT_HOST
+    return host + parts.path.rstrip('/')
+
+
+class LinkResolver:
+    """resolve link text or urls to document names with o(1) lookups.
+    built once per run from the list of valid names and their canonical urls.
+    """
+
+    def __init__(self, valid_names, source_links=None):
+        self.names = set(valid_names)
+        self.aliases = {}
+        self.urls = {}
+        self.source_links = dict(source_links or {})
+
+        # sorted so that alias collisions always resolve to the same name
+        for name in sorted(self.names):
+            self.aliases.setdefault(normalize_name(name), name)
+
+        for name, url in self.source_links.items():
+            if url and name in self.names:
+                self.urls.setdefault(normalize_url(url), name)
+
+    @classmethod
+    def from_directory(cls, valid_names, raw_directory='raw'):
+        """build a resolver, reading canonical urls from the raw html files that exist."""
+        source_links = {}
+        for name in valid_names:
+            if os.path.exists(os.path.join(raw_directory, name + '.html')):
+                source_links[name] = get_source_link(name)
+        return cls(valid_names, source_links)
+
+    def resolve_name(self, name, fold=True):
+        """return the document name for a link text, or none.
+        if fold is false, only an exact match is accepted.
+        """
+        if name in self.names:
+            return name
+        if not fold:
+            return None
+        return self.aliases.get(normalize_name(name))
+
+    def resolve_url(self, url):
+        """return the document name whose canonical url matches, or none."""
+        return self.urls.get(normalize_url(url))
+
+    def source_link(self, name):
+        """return the cached canonical url for a document, reading it if not cached."""
+        if name not in self.source_links:
+            self.source_links[name] = get_source_link(name)
+        return self.source_links[name]
+
+
 def add_source_callout(url, text):
     """add a source callout after the frontmatter."""
     callout = "> [!INFO]\n> This page was originally generated from [official documentation](" + url + ")."
@@ -221,16 +301,23 @@ def fix_dollar_signs(text):
     return ''.join(result)
 
 
-def fix_links(text, valid_names):
+def fix_links(text, resolver):
     """convert markdown links to wikilinks where appropriate.
     
     rules:
     - links starting with '//' get 'https:' prepended
-    - links starting with '/' are checked against valid_names for wikilink conversion
-    - links starting with 'http' are checked against valid_names for wikilink conversion
+    - links starting with '/' or 'http' are resolved to a document name by their
+      canonical url first, then by an exact match on their text
+    - text is matched case-insensitively (with filename aliases) only when it was
+      in backticks or is already uppercase, so prose links like [sort] are kept
     - function names are cleaned (remove backticks and ' function' suffix)
+    - links resolved by url keep their text as the wikilink alias if it differs;
+      the alias separator is escaped as \\| inside table rows
+
+    resolver may be a LinkResolver or a plain list of valid names.
     """
-    link_regex = re.compile(r'\[(.*?)\]\((.*?)\)')
+    if not isinstance(resolver, LinkResolver):
+        resolver = LinkResolver(resolver)
     
     def replacer(match):
         name, url = match.groups()
@@ -240,27 +327,32 @@ def fix_links(text, valid_names):
             url = 'https:' + url
             return f'[{name}]({url})'
         
-        elif url.startswith('/'):
+        elif url.startswith('/') or url.startswith('http'):
             cleaned_name = name.replace('`', '')
-            cleaned_name = re.sub(r' function$', '', cleaned_name)
-            
-            if cleaned_name in valid_names:
-                return f'[[{cleaned_name}]]'
-            else:
+            if cleaned_name.endswith(' function'):
+                cleaned_name = cleaned_name[:-len(' function')]
+
+            target = resolver.resolve_url(url)
+            if target:
+                if not cleaned_name or resolver.resolve_name(cleaned_name) == target:
+                    return f'[[{target}]]'
+                # a bare | would split a table cell, so escape it inside table rows
+                line_start = text.rfind('\n', 0, match.start()) + 1
+                separator = '\\|' if text[line_start:match.start()].lstrip().startswith('|') else '|'
+                return f'[[{target}{separator}{cleaned_name}]]'
+
+            fold = '`' in name or cleaned_name.isupper()
+            target = resolver.resolve_name(cleaned_name, fold=fold)
+            if target:
+                return f'[[{target}]]'
+
+            if url.startswith('/'):
                 return f'[{name}](https://support.google.com{url})'
-        
-        elif url.startswith('http'):
-            cleaned_name = name.replace('`', '')
-            cleaned_name = re.sub(r' function$', '', cleaned_name)
-            
-            if cleaned_name in valid_names:
-                return f'[[{cleaned_name}]]'
-            else:
-                return f'[{name}]({url})'
+            return f'[{name}]({url})'
         
         return match.group(0)
     
-    return link_regex.sub(replacer, text)
+    return LINK_REGEX.sub(replacer, text)
 
 
 def fix_syntax_headers(text):
@@ -310,21 +402,24 @@ def convert_bullet_lists(text):
     return '\n'.join(result)
 
 
-def process_markdown_file(file, text, valid_names):
+def process_markdown_file(file, text, resolver):
     """apply all markdown fixes to a text document.
     
     args:
         file: filename being processed
         text: the markdown text to process
-        valid_names: list of valid document names for wikilink conversion
+        resolver: LinkResolver (or list of valid document names) for wikilink conversion
         
     returns:
         the processed markdown text
     """
-    url = get_source_link(file[:-3])
+    if not isinstance(resolver, LinkResolver):
+        resolver = LinkResolver(resolver)
+
+    url = resolver.source_link(file[:-3])
 
     text = fix_google_sheets_errors(text)
-    text = fix_links(text, valid_names)
+    text = fix_links(text, resolver)
     text = fix_setext_headers(text)
     text = fix_dollar_signs(text)
     text = fix_code_blocks(text)
@@ -340,6 +435,9 @@ def process_directory(directory='parsed'):
     
     # get list of valid names for wikilink conversion
     valid_names = [file[:-3] for file in files if file.endswith('.md')]
+
+    # build the link index once for the whole run
+    resolver = LinkResolver.from_directory(valid_names)
     
     for file in tqdm(files, desc='processing markdown files'):
         if file == ".obsidian" or not file.endswith('.md'):
@@ -352,7 +450,7 @@ def process_directory(directory='parsed'):
             content = f.read()
         
         # process the content
-        content = process_markdown_file(file, content, valid_names)
+        content = process_markdown_file(file, content, resolver)
         
         # write back
         with open(filepath, 'w', encoding='utf-8') as f:
@@ -1,61 +1,525 @@
 """scrape google sheets formula documentation from the support page."""
 
 import os
+import io
+import re
+import csv
+import json
+import time
+import hashlib
+import tempfile
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from tqdm import tqdm
 
 
 FX_LIST_URL = 'https://support.google.com/docs/table/25273'
+SUPPORT_BASE_URL = 'https://support.google.com'
 
+FX_INDEX_CACHE = 'fx_index.json'
+FX_TAGS_FILE = 'function_tags.csv'
+FX_DIFF_FILE = 'fx_diff.json'
 
-def get_fx_list():
-    """scrape the urls of the functions from the google docs support page."""
-    # fetch the page content
-    response = requests.get(FX_LIST_URL)
-    soup = BeautifulSoup(response.content, 'html.parser')
-
-    # manually added function urls not in the table
-    fx_list = [
-        'https://support.google.com/docs/answer/15820999',
-        'https://support.google.com/docs/answer/12406049',
-        'https://support.google.com/docs/answer/9982776',
-        'https://support.google.com/docs/answer/9584429',
-        'https://support.google.com/docs/answer/9983035',
-    ]
-    fx_tags = ['']
-    fx_names = [
-        'AI',
-        'XMATCH',
-        'BINOM.DIST.RANGE',
-        'COUNTUNIQUEIFS',
-        'PERCENTIF',
-    ]
+# links to support articles, used to find functions missing from the table
+ARTICLE_LINK_REGEX = re.compile(r'^(?:https?:)?(?://support\.google\.com)?(/docs/answer/\d+)')
+FX_TITLE_REGEX = re.compile(r'^([A-Z][A-Z0-9._]*) function$')
+
+# articles for functions known to be missing from the table, always crawled
+SEED_ARTICLES = [
+    '/docs/answer/15820999',
+    '/docs/answer/12406049',
+    '/docs/answer/9982776',
+    '/docs/answer/9584429',
+    '/docs/answer/9983035',
+]
+
+# seconds before a crawled non-function article is fetched again
+VISITED_TTL = 7 * 24 * 60 * 60
+
+METRICS_PROM_FILE = 'scrape_metrics.prom'
+METRICS_JSON_FILE = 'scrape_metrics.json'
+
+# histogram bucket upper bounds in seconds
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class ScrapeMetrics:
+    """collect per-request telemetry for a scrape run."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.finished = None
+        self.latencies = []
+        self.ttfbs = []
+        self.bytes_total = 0
+        self.status_counts = {}
+        self.retries = 0
+        self.errors = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+
+    def record(self, status, latency, ttfb, size):
+        """record a completed request (status is 'error' if no response came back)."""
+        with self.lock:
+            self.status_counts[str(status)] = self.status_counts.get(str(status), 0) + 1
+            self.latencies.append(latency)
+            if ttfb is not None:
+                self.ttfbs.append(ttfb)
+            self.bytes_total += size
+
+    def finish(self):
+        """mark the end of the run."""
+        self.finished = time.time()
+
+    @property
+    def duration(self):
+        return (self.finished or time.time()) - self.started
+
+    def summary(self):
+        """return a json-serialisable summary of the run."""
+        duration = self.duration
+        requests_total = len(self.latencies)
+        return {
+            'started': self.started,
+            'duration_seconds': duration,
+            'requests_total': requests_total,
+            'skipped_total': self.skipped,
+            'retries_total': self.retries,
+            'errors_total': self.errors,
+            'bytes_total': self.bytes_total,
+            'status_counts': dict(sorted(self.status_counts.items())),
+            'requests_per_second': requests_total / duration if duration else 0.0,
+            'bytes_per_second': self.bytes_total / duration if duration else 0.0,
+            'latency_seconds': {
+                'p50': percentile(self.latencies, 50),
+                'p95': percentile(self.latencies, 95),
+                'p99': percentile(self.latencies, 99),
+            },
+            'ttfb_seconds': {
+                'p50': percentile(self.ttfbs, 50),
+                'p95': percentile(self.ttfbs, 95),
+                'p99': percentile(self.ttfbs, 99),
+            },
+        }
+
+    def to_prometheus(self):
+        """render the metrics in prometheus text exposition format."""
+        summary = self.summary()
+        lines = []
+
+        lines.append('# HELP scrape_requests_total completed http requests by status code.')
+        lines.append('# TYPE scrape_requests_total counter')
+        for status, count in summary['status_counts'].items():
+            lines.append(f'scrape_requests_total{{status="{status}"}} {count}')
+
+        counters = [
+            ('scrape_retries_total', 'retried http requests.', summary['retries_total']),
+            ('scrape_errors_total', 'requests that failed after all retries.', summary['errors_total']),
+            ('scrape_skipped_total', 'files skipped because they already exist.', summary['skipped_total']),
+            ('scrape_bytes_total', 'response body bytes downloaded.', summary['bytes_total']),
+        ]
+        for name, help_text, value in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            lines.append(f'{name} {value}')
+
+        gauges = [
+            ('scrape_duration_seconds', 'wall clock duration of the scrape.', summary['duration_seconds']),
+            ('scrape_requests_per_second', 'request throughput of the scrape.', summary['requests_per_second']),
+            ('scrape_bytes_per_second', 'byte throughput of the scrape.', summary['bytes_per_second']),
+            ('scrape_last_run_timestamp_seconds', 'unix time the scrape started.', summary['started']),
+        ]
+        for name, help_text, value in gauges:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value:.6f}')
+
+        histograms = [
+            ('scrape_request_latency_seconds', 'total request latency including body download.', self.latencies),
+            ('scrape_time_to_first_byte_seconds', 'time until response headers were received.', self.ttfbs),
+        ]
+        for name, help_text, values in histograms:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for bound in LATENCY_BUCKETS:
+                count = sum(1 for v in values if v <= bound)
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {len(values)}')
+            lines.append(f'{name}_sum {sum(values):.6f}')
+            lines.append(f'{name}_count {len(values)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, prom_path=METRICS_PROM_FILE, json_path=METRICS_JSON_FILE):
+        """write the prometheus and json metrics files.
+        each file is replaced atomically so collectors never read a partial file.
+        """
+        write_atomic(prom_path, self.to_prometheus())
+        write_atomic(json_path, json.dumps(self.summary(), indent=2))
+
+
+def write_atomic(path, text):
+    """write text to a temporary file next to path, then move it into place."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=directory,
+                                     prefix='.' + os.path.basename(path) + '.',
+                                     delete=False) as f:
+        f.write(text)
+        temp_path = f.name
+
+    try:
+        # temporary files are created private; match a normally written file
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+        os.replace(temp_path, path)
+    except OSError:
+        os.remove(temp_path)
+        raise
+
+
+def percentile(values, pct):
+    """nearest-rank percentile of a list of numbers, or none if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[int(rank) - 1]
+
+
+def fetch(url, metrics, max_retries=2, backoff=1.0):
+    """fetch a url, recording latency, time to first byte, size and status.
+    retries on connection errors and 5xx responses.
+
+    returns:
+        the response, or none if every attempt raised.
+    """
+    response = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            with metrics.lock:
+                metrics.retries += 1
+            time.sleep(backoff * attempt)
+
+        start = time.perf_counter()
+        try:
+            # stream so the body is read separately and headers give us ttfb
+            response = requests.get(url, stream=True)
+            ttfb = time.perf_counter() - start
+            content = response.content
+        except requests.RequestException:
+            metrics.record('error', time.perf_counter() - start, None, 0)
+            response = None
+            continue
+
+        metrics.record(response.status_code, time.perf_counter() - start, ttfb, len(content))
+        if response.status_code < 500:
+            break
+
+    return response
+
+
+def load_fx_index():
+    """load the cached function index, or an empty one if there is none."""
+    if os.path.exists(FX_INDEX_CACHE):
+        with open(FX_INDEX_CACHE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        # visited used to be a plain list without timestamps
+        if not isinstance(index.get('visited'), dict):
+            index['visited'] = {}
+        index.setdefault('links', {})
+        return index
+    return {'table_hash': None, 'table': [], 'discovered': [], 'visited': {}, 'links': {}}
+
+
+def save_fx_index(index):
+    """write the function index cache."""
+    with open(FX_INDEX_CACHE, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+
+
+def parse_fx_table(content):
+    """parse the function table into a list of [name, tag, url] rows."""
+    soup = BeautifulSoup(content, 'html.parser')
+    rows = []
 
     # all links are within a table (tbody)
     # columns are fx type, fx name, fx syntax, fx description
     # link to full documentation is in the description with a 'learn more' link
     table_body = soup.find('tbody')
 
-    rows = table_body.find_all('tr')
-    for row in rows:
+    for row in table_body.find_all('tr'):
         cols = row.find_all('td')
         fx_link = cols[3].find('a')['href']
         fx_name = cols[1].text
-        
+
         # some links are relative, so we need to add the base url for the ones that start with /
         if fx_link.startswith('/'):
-            fx_link = 'https://support.google.com' + fx_link
+            fx_link = SUPPORT_BASE_URL + fx_link
+
+        rows.append([fx_name, cols[0].text, fx_link])
 
-        # add to the lists
-        fx_tags.append(cols[0].text)
-        fx_list.append(fx_link)
-        fx_names.append(fx_name)
+    return rows
+
+
+def get_fx_list(index=None, metrics=None):
+    """scrape the urls of the functions from the google docs support page.
+    the table is only re-parsed when the hash of its tbody has changed.
+    functions found by discover_functions on earlier runs are included.
+    if the page cannot be fetched, the cached table is used when there is one.
+
+    returns:
+        fx_list, fx_tags, fx_names as aligned lists.
+    """
+    if index is None:
+        index = load_fx_index()
+    if metrics is None:
+        metrics = ScrapeMetrics()
+
+    # fetch the page content
+    response = fetch(FX_LIST_URL, metrics)
+    content = response.content if response is not None and response.status_code == 200 else b''
+
+    # hash only the table, since the rest of the page changes between requests
+    table_start = content.find(b'<tbody')
+    table_end = content.find(b'</tbody>', table_start)
+
+    if table_start == -1 or table_end == -1:
+        metrics.errors += 1
+        status = response.status_code if response is not None else 'connection error'
+        if not index['table']:
+            raise RuntimeError(f"failed to fetch function table ({FX_LIST_URL}): {status}")
+        print(f"failed to fetch function table ({FX_LIST_URL}): {status}, using cached table")
+        table_hash = index['table_hash']
+    else:
+        table_hash = hashlib.sha256(content[table_start:table_end]).hexdigest()
+
+    if table_hash != index['table_hash'] or not index['table']:
+        index['table'] = parse_fx_table(content)
+        index['table_hash'] = table_hash
+        save_fx_index(index)
+
+    # drop discovered functions that have since been added to the table
+    table_names = {name for name, _, _ in index['table']}
+    index['discovered'] = [row for row in index['discovered'] if row[0] not in table_names]
+
+    rows = index['table'] + index['discovered']
+    fx_names = [name for name, _, _ in rows]
+    fx_tags = [tag for _, tag, _ in rows]
+    fx_list = [url for _, _, url in rows]
 
     return fx_list, fx_tags, fx_names
 
 
-def get_raw_files(fx_list, fx_tags, fx_names, skip_existing=True):
+def fx_filename(name):
+    """return the raw html filename for a function name."""
+    return f"{name.replace(' ', '_').replace('/', '-')}.html"
+
+
+def article_path(url):
+    """return the /docs/answer/<id> path of a support article url, or none."""
+    match = ARTICLE_LINK_REGEX.match(url)
+    return match.group(1) if match else None
+
+
+def get_article_links(html):
+    """return the article paths linked from the body of a support page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    article = soup.find('section', class_='article-container') or soup
+
+    paths = set()
+    for link in article.find_all('a', href=True):
+        path = article_path(link['href'])
+        if path:
+            paths.add(path)
+    return paths
+
+
+def cached_article_links(links, filepath):
+    """return the article paths linked from a raw file, or none if it does not exist.
+    links maps filenames to the (mtime_ns, size) they were parsed at and their paths,
+    so a file is only parsed again when it is new or has changed.
+    """
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+
+    filename = os.path.basename(filepath)
+    signature = [stat.st_mtime_ns, stat.st_size]
+    entry = links.get(filename)
+    if entry is None or entry['signature'] != signature:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            paths = get_article_links(f.read())
+        entry = {'signature': signature, 'paths': sorted(paths)}
+        links[filename] = entry
+
+    return set(entry['paths'])
+
+
+def fetch_article(path, metrics):
+    """fetch a support article and return (path, function name or none, html)."""
+    response = fetch(f'{SUPPORT_BASE_URL}{path}?hl=en', metrics)
+    if response is None or response.status_code != 200:
+        return path, None, None
+
+    heading = BeautifulSoup(response.content, 'html.parser').find('h1')
+    match = FX_TITLE_REGEX.match(heading.text.strip()) if heading else None
+    return path, match.group(1) if match else None, response.text
+
+
+def discover_functions(fx_names, index=None, metrics=None, max_depth=2, max_workers=8):
+    """crawl 'learn more' and related-function links in the raw pages to find
+    functions that are not in the table.
+
+    the frontier is deduplicated against every known and recently visited
+    article, and pages are fetched with at most max_workers requests in flight.
+    discovered function pages are saved to raw/ as they are found.
+
+    returns:
+        list of [name, tag, url] rows for newly discovered functions.
+    """
+    if index is None:
+        index = load_fx_index()
+    if metrics is None:
+        metrics = ScrapeMetrics()
+
+    out_dir = 'raw'
+    now = time.time()
+
+    # expire old visits so articles that later become function pages are found
+    index['visited'] = {path: visited_at for path, visited_at in index['visited'].items()
+                        if now - visited_at < VISITED_TTL and path not in SEED_ARTICLES}
+
+    known = {article_path(url) for _, _, url in index['table'] + index['discovered']}
+    seen = known | set(index['visited'])
+    names = set(fx_names)
+
+    # seed the frontier from the raw pages we already have, reusing the links
+    # cached for files that have not changed. entries for files that are gone
+    # from the function list are dropped.
+    links = {}
+    previous_links = index['links']
+    frontier = set(SEED_ARTICLES)
+    for name in fx_names:
+        filename = fx_filename(name)
+        if filename in previous_links:
+            links[filename] = previous_links[filename]
+        paths = cached_article_links(links, os.path.join(out_dir, filename))
+        if paths:
+            frontier |= paths
+    index['links'] = links
+    frontier -= seen
+
+    discovered = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in range(max_depth):
+            if not frontier:
+                break
+            seen |= frontier
+
+            next_frontier = set()
+            results = executor.map(lambda path: fetch_article(path, metrics), sorted(frontier))
+            for path, name, html in tqdm(results, total=len(frontier), desc='discovering'):
+                if html is None:
+                    # leave failed fetches out of visited so they are retried next run
+                    seen.discard(path)
+                    continue
+                if name is None or name in names:
+                    # seeds are never marked visited, so they are retried every run
+                    if path not in SEED_ARTICLES:
+                        index['visited'][path] = now
+                    continue
+
+                filepath = os.path.join(out_dir, fx_filename(name))
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    f.write(html)
+
+                names.add(name)
+                discovered.append([name, '', f'{SUPPORT_BASE_URL}{path}?hl=en'])
+                next_frontier |= cached_article_links(links, filepath)
+
+            frontier = next_frontier - seen
+
+    index['discovered'].extend(discovered)
+    save_fx_index(index)
+
+    return discovered
+
+
+def update_fx_tags(fx_names, fx_tags):
+    """rewrite function_tags.csv from the current function list and write a diff of
+    new and removed (name, type) rows to fx_diff.json.
+    rows keep the order of the function list, and a function listed under several
+    types keeps one row per type. tags already in the catalog are kept for
+    functions the table has no tag for.
+
+    returns:
+        the diff as a dictionary with 'new' and 'removed' lists of [name, type] rows.
+    """
+    previous = []
+    line_ending = '\n'
+    trailing_newline = True
+    if os.path.exists(FX_TAGS_FILE):
+        with open(FX_TAGS_FILE, 'r', encoding='utf-8', newline='') as f:
+            content = f.read()
+
+        # keep the catalog's existing line endings so diffs stay readable
+        if '\r\n' in content:
+            line_ending = '\r\n'
+        trailing_newline = content.endswith('\n')
+
+        reader = csv.reader(io.StringIO(content))
+        next(reader, None)
+        for row in reader:
+            if len(row) == 2:
+                previous.append((row[0], row[1].strip()))
+
+    previous_tags = {}
+    for name, tag in previous:
+        previous_tags.setdefault(name, []).append(tag)
+
+    current = []
+    for name, tag in zip(fx_names, fx_tags):
+        if tag.strip():
+            current.append((name, tag.strip()))
+        else:
+            current.extend((name, t) for t in previous_tags.get(name, ['Unknown']))
+
+    # drop exact duplicates but keep the first occurrence's position
+    current = list(dict.fromkeys(current))
+
+    previous_rows = set(previous)
+    current_rows = set(current)
+    diff = {
+        'new': [list(row) for row in current if row not in previous_rows],
+        'removed': [list(row) for row in dict.fromkeys(previous) if row not in current_rows],
+    }
+
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator=line_ending)
+    writer.writerow(['Name', 'Type'])
+    for name, tag in current:
+        writer.writerow([name, tag])
+
+    text = output.getvalue()
+    if not trailing_newline:
+        text = text[:-len(line_ending)]
+
+    with open(FX_TAGS_FILE, 'w', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+    with open(FX_DIFF_FILE, 'w', encoding='utf-8') as f:
+        json.dump(diff, f, indent=2)
+
+    print(f"functions: {len(diff['new'])} new, {len(diff['removed'])} removed")
+
+    return diff
+
+
+def get_raw_files(fx_list, fx_tags, fx_names, skip_existing=True, metrics=None):
     """get the raw html files for the functions.
 
     parameters:
@@ -63,25 +527,57 @@ def get_raw_files(fx_list, fx_tags, fx_names, skip_existing=True):
         fx_tags (list[str]): list of function tags/categories.
         fx_names (list[str]): list of function names.
         skip_existing (bool): if true, skip downloading files that already exist.
+        metrics (ScrapeMetrics): collector for request telemetry. if omitted, one is
+            created and the metrics files are written when the downloads finish.
+
+    returns:
+        the metrics collector.
     """
     out_dir = 'raw'
     os.makedirs(out_dir, exist_ok=True)
 
+    # only write the metrics files here if the caller is not collecting them
+    owns_metrics = metrics is None
+    if owns_metrics:
+        metrics = ScrapeMetrics()
+
     for fx, tag, name in tqdm(zip(fx_list, fx_tags, fx_names), total=len(fx_list), desc='downloading'):
-        filename = f"{name.replace(' ', '_').replace('/', '-')}.html"
+        filename = fx_filename(name)
         filepath = os.path.join(out_dir, filename)
 
         if skip_existing and os.path.exists(filepath):
+            metrics.skipped += 1
             continue
 
-        response = requests.get(fx)
-        if response.status_code == 200:
+        response = fetch(fx, metrics)
+        if response is not None and response.status_code == 200:
             with open(filepath, 'w', encoding='utf-8') as file:
                 file.write(response.text)
         else:
-            print(f"failed to fetch {name} ({fx}): {response.status_code}")
+            metrics.errors += 1
+            status = response.status_code if response is not None else 'connection error'
+            print(f"failed to fetch {name} ({fx}): {status}")
+
+    if owns_metrics:
+        metrics.finish()
+        metrics.write()
+
+    return metrics
 
 
 if __name__ == "__main__":
-    fx_list, fx_tags, fx_names = get_fx_list()
-    get_raw_files(fx_list, fx_tags, fx_names)
+    metrics = ScrapeMetrics()
+    index = load_fx_index()
+
+    # write the metrics even if the run fails, so failures show up in alerting
+    try:
+        fx_list, fx_tags, fx_names = get_fx_list(index, metrics)
+        get_raw_files(fx_list, fx_tags, fx_names, metrics=metrics)
+
+        discovered = discover_functions(fx_names, index, metrics)
+        fx_names += [name for name, _, _ in discovered]
+        fx_tags += [tag for _, tag, _ in discovered]
+        update_fx_tags(fx_names, fx_tags)
+    finally:
+        metrics.finish()
+        metrics.write()
@@ -0,0 +1,21 @@
+"""tests for html to markdown conversion."""
+
+from bs4 import BeautifulSoup
+
+import convert
+
+
+HTML = ('<section><p>a</p><p>b</p><p>c</p><p>Returns things.</p>'
+        '<table class="nice"><tr><td>x</td></tr><tr><td>y</td></tr></table>'
+        '<iframe src="//www.youtube.com/embed/x"></iframe></section>')
+
+
+def test_conversion_leaves_article_unchanged():
+    article = BeautifulSoup(HTML, 'html.parser')
+
+    first = convert.fx_to_md('ABS', article, {})
+    assert str(article) == HTML
+
+    # a cached article converts the same way every time
+    assert convert.fx_to_md('ABS', article, {}) == first
+    assert 'src="https://www.youtube.com/embed/x"' in first
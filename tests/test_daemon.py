@@ -0,0 +1,34 @@
+"""tests for the warm worker."""
+
+import os
+
+import daemon
+
+
+def write_raw(tmp_path, name, url):
+    html = (f'<html><head><link rel="canonical" href="{url}"></head><body>'
+            f'<section class="article-container"><h1>{name} function</h1>'
+            '<p>a</p><p>b</p><p>Returns things.</p></section></body></html>')
+    path = tmp_path / 'raw' / f'{name}.html'
+    path.write_text(html, encoding='utf-8')
+    return path
+
+
+def test_refresh_rereads_canonical_link_of_changed_raw_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('raw')
+    (tmp_path / 'function_tags.csv').write_text('Name,Type\nABS,Math\n', encoding='utf-8')
+    path = write_raw(tmp_path, 'ABS', 'https://support.google.com/docs/answer/1')
+
+    worker = daemon.Worker()
+    worker.refresh()
+    assert worker.resolver.resolve_url('/docs/answer/1') == 'ABS'
+
+    # re-scrape the page with a new canonical url
+    write_raw(tmp_path, 'ABS', 'https://support.google.com/docs/answer/2')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    worker.refresh()
+
+    assert worker.resolver.resolve_url('/docs/answer/2') == 'ABS'
+    assert worker.resolver.resolve_url('/docs/answer/1') is None
@@ -0,0 +1,46 @@
+"""tests for markdown link processing."""
+
+from bs4 import BeautifulSoup
+
+import convert
+from processing import LinkResolver, fix_links
+
+
+ABS_URL = 'https://support.google.com/docs/answer/3093459?hl=en'
+
+
+def make_resolver():
+    return LinkResolver(['ABS', 'SUM'], {'ABS': ABS_URL})
+
+
+def test_url_match_keeps_text_as_alias():
+    text = 'see [absolute value](/docs/answer/3093459) here'
+    assert fix_links(text, make_resolver()) == 'see [[ABS|absolute value]] here'
+
+
+def test_url_match_in_table_escapes_alias_separator():
+    text = '| Name | Notes |\n| --- | --- |\n| [absolute value](/docs/answer/3093459) | x |'
+    result = fix_links(text, make_resolver())
+
+    assert result.split('\n')[2] == '| [[ABS\\|absolute value]] | x |'
+    # the row still has the same number of unescaped cell separators
+    assert result.split('\n')[2].replace('\\|', '').count('|') == 3
+
+
+def test_converted_table_link_stays_in_one_cell():
+    html = ('<section><p>a</p><p>b</p><p>c</p><table>'
+            '<tr><td><b>Name</b></td><td><b>Notes</b></td></tr>'
+            '<tr><td><b>Name</b></td><td><b>Notes</b></td></tr>'
+            '<tr><td><a href="/docs/answer/3093459">absolute value</a></td><td>x</td></tr>'
+            '</table></section>')
+    article = BeautifulSoup(html, 'html.parser')
+    text = fix_links(convert.fx_to_md('ABS', article, {}), make_resolver())
+
+    rows = [line for line in text.split('\n') if 'absolute value' in line]
+    assert rows == ['| [[ABS\\|absolute value]] | x |']
+
+
+def test_prose_link_to_unknown_article_is_not_folded():
+    text = '[sort](https://support.google.com/docs/answer/999)'
+    resolver = LinkResolver(['SORT'])
+    assert fix_links(text, resolver) == text
@@ -0,0 +1,49 @@
+"""tests for function discovery."""
+
+import os
+
+import raw_scrape
+
+
+PAGE = '<section class="article-container"><a href="/docs/answer/1?hl=en">x</a></section>'
+
+
+def test_discovery_only_reparses_changed_raw_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('raw')
+    (tmp_path / 'raw' / 'ABS.html').write_text(PAGE, encoding='utf-8')
+
+    parsed = []
+    get_article_links = raw_scrape.get_article_links
+
+    def counting_get_article_links(html):
+        parsed.append(html)
+        return get_article_links(html)
+
+    monkeypatch.setattr(raw_scrape, 'get_article_links', counting_get_article_links)
+    monkeypatch.setattr(raw_scrape, 'fetch_article', lambda path, metrics: (path, None, '<h1>x</h1>'))
+
+    index = raw_scrape.load_fx_index()
+    raw_scrape.discover_functions(['ABS'], index)
+    assert len(parsed) == 1
+    assert index['links']['ABS.html']['paths'] == ['/docs/answer/1']
+
+    # unchanged file, so the cached links are used
+    raw_scrape.discover_functions(['ABS'], raw_scrape.load_fx_index())
+    assert len(parsed) == 1
+
+    # changed file, so it is parsed again
+    (tmp_path / 'raw' / 'ABS.html').write_text(PAGE + ' ', encoding='utf-8')
+    raw_scrape.discover_functions(['ABS'], raw_scrape.load_fx_index())
+    assert len(parsed) == 2
+
+
+def test_seed_articles_are_never_marked_visited(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('raw')
+    monkeypatch.setattr(raw_scrape, 'fetch_article', lambda path, metrics: (path, None, '<h1>x</h1>'))
+
+    index = raw_scrape.load_fx_index()
+    raw_scrape.discover_functions([], index)
+
+    assert not set(index['visited']) & set(raw_scrape.SEED_ARTICLES)
@@ -0,0 +1,62 @@
+"""tests for syncing and watching the vault."""
+
+from types import SimpleNamespace
+
+import update
+
+
+def write(path, text):
+    path.write_bytes(text.encode('utf-8'))
+
+
+def test_crlf_copy_is_unchanged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    target, updated = tmp_path / 'target', tmp_path / 'updated'
+    target.mkdir()
+    updated.mkdir()
+    write(target / 'ABS.md', 'a\r\nb\r\n')
+    write(updated / 'ABS.md', 'a\nb\n')
+
+    update.update_files(str(target), str(updated))
+
+    assert (target / 'ABS.md').read_bytes() == b'a\r\nb\r\n'
+    assert '## Files Unchanged (1)' in (tmp_path / 'update_log.txt').read_text()
+
+
+def test_poll_changes_reports_writes_made_before_iteration(tmp_path):
+    directory = tmp_path / 'updated'
+    directory.mkdir()
+
+    changes = update.poll_changes([str(directory)], interval=0.01, debounce=0.01)
+    write(directory / 'ABS.md', 'new')
+
+    assert next(changes) == {(str(directory), 'ABS.md')}
+
+
+class FakeINotify:
+    """stand-in for inotify_simple.INotify that replays canned events."""
+
+    reads = []
+
+    def add_watch(self, path, mask):
+        return 1
+
+    def read(self, timeout=None):
+        return self.reads.pop(0) if self.reads else []
+
+
+def test_inotify_overflow_yields_resync(monkeypatch):
+    fake_flags = SimpleNamespace(CLOSE_WRITE=8, MOVED_TO=128, MOVED_FROM=64, DELETE=512, Q_OVERFLOW=0x4000)
+    monkeypatch.setattr(update, 'INotify', FakeINotify)
+    monkeypatch.setattr(update, 'flags', fake_flags, raising=False)
+    FakeINotify.reads = [
+        [SimpleNamespace(wd=-1, mask=fake_flags.Q_OVERFLOW, name='')],
+        [],
+        [SimpleNamespace(wd=1, mask=fake_flags.CLOSE_WRITE, name='ABS.md')],
+        [],
+    ]
+
+    changes = update.inotify_changes(['updated'], debounce=0.01)
+
+    assert next(changes) is None
+    assert next(changes) == {('updated', 'ABS.md')}
@@ -1,69 +1,100 @@
 """utility to update markdown files from source to target directory.
 respects the 'modified' tag in frontmatter to avoid overwriting manually edited files.
+can run once, or in watch mode to sync files as they change.
 """
 
 import os
 import sys
+import time
 import shutil
+import hashlib
 import frontmatter
 from datetime import datetime
 
+try:
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
 
-def files_are_identical(path1, path2):
-    """return true if two files have identical text content."""
+
+def content_digest(content):
+    """return the sha256 hex digest of file content with newlines normalised.
+    crlf and lf copies of the same text hash the same, matching a text-mode compare.
+    content that is not valid utf-8 is hashed as raw bytes.
+    """
     try:
-        with open(path1, 'r', encoding='utf-8') as f1, \
-             open(path2, 'r', encoding='utf-8') as f2:
-            return f1.read() == f2.read()
-    except Exception:
-        return False
+        text = content.decode('utf-8')
+    except UnicodeDecodeError:
+        return hashlib.sha256(content).hexdigest()
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
 
-def update_files(target_dir, updated_dir):
-    """update files in target directory from updated directory, respecting modifications."""
-    log_file = 'update_log.txt'
-    
-    replaced_files = []
-    skipped_modified_files = []
-    unchanged_files = []
-    new_files = []
-    error_files = []
-    
-    updated_files = [f for f in os.listdir(updated_dir) if f.endswith('.md')]
-    
-    for filename in updated_files:
-        updated_file_path = os.path.join(updated_dir, filename)
-        target_file_path = os.path.join(target_dir, filename)
-        
-        try:
-            if os.path.exists(target_file_path):
-                # check if manually modified
-                with open(target_file_path, 'r', encoding='utf-8') as f:
-                    post = frontmatter.load(f)
-                    metadata_tags = post.get('tags', [])
-                
-                if 'modified' in metadata_tags:
-                    skipped_modified_files.append(filename)
-                    continue
+def file_digest(path):
+    """return the newline-normalised sha256 hex digest of a file."""
+    with open(path, 'rb') as f:
+        return content_digest(f.read())
 
-                # check if identical
-                if files_are_identical(updated_file_path, target_file_path):
-                    unchanged_files.append(filename)
-                    continue
 
-                # replace if not modified and content differs
-                shutil.copy2(updated_file_path, target_file_path)
-                replaced_files.append(filename)
+def file_signature(path):
+    """return (mtime_ns, size) for a file, or none if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
-            else:
-                # does not exist — new file
-                shutil.copy2(updated_file_path, target_file_path)
-                new_files.append(filename)
-        
-        except Exception as e:
-            error_files.append((filename, str(e)))
-    
-    # write log
+
+class TargetState:
+    """in-memory cache of each target file's content hash and 'modified' tag.
+    entries are read lazily and dropped when the file changes on disk.
+    """
+
+    def __init__(self, target_dir):
+        self.target_dir = target_dir
+        self.entries = {}
+        self.signatures = {}
+
+    def get(self, filename):
+        """return (digest, is_modified) for a target file, or none if it does not exist."""
+        if filename not in self.entries:
+            path = os.path.join(self.target_dir, filename)
+            signature = file_signature(path)
+            if signature is None:
+                return None
+
+            with open(path, 'rb') as f:
+                content = f.read()
+            post = frontmatter.loads(content.decode('utf-8'))
+            metadata_tags = post.get('tags', []) or []
+
+            self.entries[filename] = (content_digest(content), 'modified' in metadata_tags)
+            self.signatures[filename] = signature
+
+        return self.entries[filename]
+
+    def set(self, filename, digest):
+        """record that a file was just copied into the target with the given digest."""
+        self.entries[filename] = (digest, False)
+        self.signatures[filename] = file_signature(os.path.join(self.target_dir, filename))
+
+    def invalidate(self, filename):
+        """forget a file so it is re-read on next access."""
+        self.entries.pop(filename, None)
+        self.signatures.pop(filename, None)
+
+    def invalidate_if_changed(self, filename):
+        """forget a file only if it no longer matches what was last read or written.
+        this ignores the events caused by our own copies into the target.
+        """
+        signature = self.signatures.get(filename)
+        if signature is None or signature != file_signature(os.path.join(self.target_dir, filename)):
+            self.invalidate(filename)
+
+
+def write_log(log_file, total, replaced_files, unchanged_files,
+              skipped_modified_files, new_files, error_files):
+    """write the update log and print a console summary."""
     with open(log_file, 'w', encoding='utf-8') as log:
         log.write(f"# File Update Log - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
         
@@ -98,7 +129,7 @@ def update_files(target_dir, updated_dir):
             log.write("\n")
         
         log.write("## Summary:\n")
-        log.write(f"  - Total files processed: {len(updated_files)}\n")
+        log.write(f"  - Total files processed: {total}\n")
         log.write(f"  - Replaced: {len(replaced_files)}\n")
         log.write(f"  - Unchanged: {len(unchanged_files)}\n")
         log.write(f"  - Skipped (modified): {len(skipped_modified_files)}\n")
@@ -115,13 +146,194 @@ def update_files(target_dir, updated_dir):
     print(f"\ndetailed log written to: {log_file}")
 
 
+def update_files(target_dir, updated_dir, filenames=None, state=None):
+    """update files in target directory from updated directory, respecting modifications.
+
+    parameters:
+        target_dir (str): directory to update.
+        updated_dir (str): directory with the regenerated files.
+        filenames (list[str]): only sync these files; defaults to every .md file in updated_dir.
+        state (TargetState): cached target hashes and tags; a fresh one is used if omitted.
+    """
+    log_file = 'update_log.txt'
+    
+    replaced_files = []
+    skipped_modified_files = []
+    unchanged_files = []
+    new_files = []
+    error_files = []
+    
+    if state is None:
+        state = TargetState(target_dir)
+
+    if filenames is None:
+        updated_files = [f for f in os.listdir(updated_dir) if f.endswith('.md')]
+    else:
+        updated_files = list(filenames)
+    
+    for filename in updated_files:
+        updated_file_path = os.path.join(updated_dir, filename)
+        target_file_path = os.path.join(target_dir, filename)
+        
+        try:
+            target = state.get(filename)
+            updated_digest = file_digest(updated_file_path)
+
+            if target is not None:
+                target_digest, is_modified = target
+
+                # check if manually modified
+                if is_modified:
+                    skipped_modified_files.append(filename)
+                    continue
+
+                # check if identical
+                if updated_digest == target_digest:
+                    unchanged_files.append(filename)
+                    continue
+
+                # replace if not modified and content differs
+                shutil.copy2(updated_file_path, target_file_path)
+                replaced_files.append(filename)
+
+            else:
+                # does not exist — new file
+                shutil.copy2(updated_file_path, target_file_path)
+                new_files.append(filename)
+
+            state.set(filename, updated_digest)
+        
+        except Exception as e:
+            state.invalidate(filename)
+            error_files.append((filename, str(e)))
+    
+    write_log(log_file, len(updated_files), replaced_files, unchanged_files,
+              skipped_modified_files, new_files, error_files)
+
+
+def snapshot_directory(directory):
+    """return {filename: (mtime_ns, size)} for the .md files in a directory."""
+    snapshot = {}
+    for entry in os.scandir(directory):
+        if entry.name.endswith('.md') and entry.is_file():
+            stat = entry.stat()
+            snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def poll_changes(directories, interval=1.0, debounce=1.0):
+    """return an iterator of sets of (directory, filename) changes found by polling
+    modification times. the first snapshot is taken before this returns, so changes
+    made from then on are reported.
+    a batch is yielded once no further changes are seen for the debounce period.
+    """
+    snapshots = {d: snapshot_directory(d) for d in directories}
+
+    def batches():
+        pending = set()
+        last_change = None
+
+        while True:
+            time.sleep(interval if not pending else min(interval, debounce))
+
+            for directory in directories:
+                current = snapshot_directory(directory)
+                previous = snapshots[directory]
+                for name in current.keys() | previous.keys():
+                    if current.get(name) != previous.get(name):
+                        pending.add((directory, name))
+                        last_change = time.monotonic()
+                snapshots[directory] = current
+
+            if pending and time.monotonic() - last_change >= debounce:
+                yield pending
+                pending = set()
+
+    return batches()
+
+
+def inotify_changes(directories, debounce=1.0):
+    """return an iterator of sets of (directory, filename) changes from inotify.
+    the watches are added before this returns, so changes made from then on are reported.
+    a batch is yielded once no further events arrive for the debounce period.
+    if the kernel event queue overflows, none is yielded instead of a batch,
+    meaning events were lost and everything must be resynced.
+    """
+    inotify = INotify()
+    mask = flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE
+    watches = {inotify.add_watch(d, mask): d for d in directories}
+
+    def batches():
+        pending = set()
+        overflowed = False
+
+        while True:
+            # block until something happens, then keep reading until events go quiet
+            waiting = pending or overflowed
+            events = inotify.read(timeout=debounce * 1000 if waiting else None)
+            if not events and waiting:
+                yield None if overflowed else pending
+                pending = set()
+                overflowed = False
+                continue
+
+            for event in events:
+                if event.mask & flags.Q_OVERFLOW:
+                    overflowed = True
+                elif event.name.endswith('.md') and event.wd in watches:
+                    pending.add((watches[event.wd], event.name))
+
+    return batches()
+
+
+def watch_files(target_dir, updated_dir, debounce=1.0, interval=1.0):
+    """sync once, then keep syncing files as they change in the updated directory.
+    uses inotify when available and falls back to polling otherwise.
+    """
+    # start watching before the first sync so files written during it are not missed
+    directories = [target_dir, updated_dir]
+    if INotify is not None and sys.platform.startswith('linux'):
+        changes = inotify_changes(directories, debounce=debounce)
+        mode = 'inotify'
+    else:
+        changes = poll_changes(directories, interval=interval, debounce=debounce)
+        mode = 'polling'
+
+    state = TargetState(target_dir)
+    update_files(target_dir, updated_dir, state=state)
+
+    print(f"watching for changes ({mode})...")
+
+    for batch in changes:
+        if batch is None:
+            # events were dropped, so nothing cached can be trusted
+            print("event queue overflowed, resyncing everything...")
+            state = TargetState(target_dir)
+            update_files(target_dir, updated_dir, state=state)
+            continue
+
+        to_sync = set()
+        for directory, filename in batch:
+            if directory == target_dir:
+                # edited, tagged or removed in the vault, so re-read it when needed
+                state.invalidate_if_changed(filename)
+            elif os.path.exists(os.path.join(updated_dir, filename)):
+                to_sync.add(filename)
+
+        if to_sync:
+            update_files(target_dir, updated_dir, filenames=sorted(to_sync), state=state)
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("usage: python update.py <target_directory> <updated_directory>")
+    watch = '--watch' in sys.argv[1:]
+    args = [arg for arg in sys.argv[1:] if arg != '--watch']
+
+    if len(args) != 2:
+        print("usage: python update.py [--watch] <target_directory> <updated_directory>")
         sys.exit(1)
     
-    target_directory = sys.argv[1]
-    updated_directory = sys.argv[2]
+    target_directory = args[0]
+    updated_directory = args[1]
     
     if not os.path.exists(target_directory) or not os.path.isdir(target_directory):
         print(f"error: target directory '{target_directory}' is invalid.")
@@ -131,4 +343,10 @@ if __name__ == "__main__":
         print(f"error: updated directory '{updated_directory}' is invalid.")
         sys.exit(1)
     
-    update_files(target_directory, updated_directory)
+    if watch:
+        try:
+            watch_files(target_directory, updated_directory)
+        except KeyboardInterrupt:
+            print("\nstopped watching.")
+    else:
+        update_files(target_directory, updated_directory)